@@ -1,16 +1,23 @@
 # main.py
 
+from __future__ import annotations
+
 import functions_framework as ff
 import logging as log
-from typing import Dict, Any
-from cloudevents.http import CloudEvent
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    from cloudevents.http import CloudEvent
+
+# Configure basic logging once at import (a no-op if a root handler already exists).
+# No timestamp in the format: Cloud Logging stamps every entry it captures.
+# Must run before the handler import: its import-time log calls would otherwise install the default config.
+log.basicConfig(level=log.INFO, format='%(levelname)s: %(message)s')
 
 # Local import of the core handler function
+# (importing it also creates the shared GCS client during the instance's global init phase)
 from modules.handler import handle_gcs_event_data
 
-# Configure basic logging (if not done globally elsewhere)
-log.basicConfig(level=log.INFO, format='%(asctime)s %(levelname)s: %(message)s')
-
 
 @ff.cloud_event
 def data_ingest_process(cloud_event: CloudEvent) -> None:
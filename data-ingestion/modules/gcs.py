@@ -1,36 +1,122 @@
 # modules/gcs.py
 
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core.exceptions import BadRequest, MethodNotImplemented
 from google.cloud import storage
-from google.cloud.storage.client import Client
-from google.cloud.storage.blob import Blob
-from google.cloud.storage.bucket import Bucket
+from google.cloud.storage.retry import DEFAULT_RETRY, ConditionalRetryPolicy, is_generation_specified
 import logging as log
-from typing import Optional, Tuple, Union
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+# Type-only imports: annotations are deferred and never evaluated at runtime
+if TYPE_CHECKING:
+    from google.cloud.storage.client import Client
+    from google.cloud.storage.blob import Blob
+    from google.cloud.storage.bucket import Bucket
 
 # NOTE: Pylance warnings about missing stubs for google-cloud-storage are expected and harmless.
 
+# Bounded request budget: (connect, read) timeout per HTTP call and an overall retry deadline.
+# Typed as Any: the SDK accepts these values, but pyright infers its parameter types from the int/Retry defaults.
+_TIMEOUT: Any = (2.0, 10.0)
+_RETRY = DEFAULT_RETRY.with_deadline(10.0)
+# Mutations are only retried when a generation precondition makes them idempotent
+_RETRY_IF_GENERATION_SPECIFIED: Any = ConditionalRetryPolicy(_RETRY, is_generation_specified, ["query_params"])
+
+# Object name probed by GCSClient.warm_up (it need not exist)
+_WARM_UP_BLOB_NAME: str = ".warm-up"
+
+# Upper bound on concurrent moves issued by GCSClient.move_blobs.
+# Matches the shared client's HTTP connection pool (requests' default pool_maxsize=10); more would open
+# connections the pool then discards.
+_MAX_CONCURRENT_MOVES: int = 10
+
+# Module-level storage client, shared by every GCSClient instance (and warm invocation)
+_STORAGE_CLIENT: Optional[Client] = None
+
+
+def _get_client() -> Client:
+    """
+    Lazily initializes the shared GCS storage client once per process.
+    """
+    global _STORAGE_CLIENT
+    if _STORAGE_CLIENT is None:
+        _STORAGE_CLIENT = storage.Client()
+        log.debug("GCS storage client initialized.")
+    return _STORAGE_CLIENT
+
+
+def _iter_lines(content: bytes, end: int) -> Iterator[bytes]:
+    """
+    Lazily yields the '\n'-separated lines of content[:end] (without the line terminator).
+    Unlike bytes.splitlines(), only the lines actually consumed are materialized.
+    """
+    pos: int = 0
+    while pos < end:
+        newline: int = content.find(b"\n", pos, end)
+        if newline == -1:
+            newline = end
+        yield content[pos:newline].rstrip(b"\r")
+        pos = newline + 1
+
+
 class GCSClient:
     """
     Class to perform reusable operations on Google Cloud Storage (GCS) buckets and blobs.
-    It initializes the storage client for re-use across method calls.
+    It re-uses a single process-wide storage client across instances and method calls.
     """
-    # Type hints for instance variables
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = ("storage_client", "bucket_name", "blob_name", "_bucket_cache")
+
+    # Type hints for instance variables (bare annotations do not conflict with __slots__)
     storage_client: Client
     bucket_name: Optional[str]
     blob_name: Optional[str]
+    _bucket_cache: Dict[str, Bucket]
 
     def __init__(self, bucket_name: Optional[str] = None, blob_name: Optional[str] = None) -> None:
         """
         Initializes the GCS client with optional default bucket/blob names.
         """
-        # 1. Initialize the GCS client once
-        self.storage_client = storage.Client()
-        log.debug("GCS storage client initialized.")
+        # 1. Re-use the shared GCS client (initialized once per process)
+        self.storage_client = _get_client()
 
         # 2. Assign optional default names
         self.bucket_name = bucket_name
         self.blob_name = blob_name
 
+        # 3. Cache of Bucket references, keyed by bucket name
+        self._bucket_cache = {}
+
+    def _bucket(self, bucket_name: str) -> Bucket:
+        """Internal helper to return a cached Bucket reference, creating it on first use."""
+        bucket: Optional[Bucket] = self._bucket_cache.get(bucket_name)
+        if bucket is None:
+            bucket = self.storage_client.bucket(bucket_name)
+            self._bucket_cache[bucket_name] = bucket
+        return bucket
+
+    def warm_up(self) -> None:
+        """
+        Issues one cheap authenticated request against the default bucket so the OAuth token fetch
+        and TCP/TLS handshake happen now (e.g. at import) rather than on the first real request.
+        Never raises; a failure only means the first real request pays the setup cost.
+        """
+        if self.bucket_name is None:
+            log.debug("GCSClient: No default bucket; skipping warm-up.")
+            return
+
+        try:
+            # A metadata GET on a sentinel name: needs only storage.objects.get, and a 404 is a normal result
+            # None disables retries so a failing warm-up cannot stall init; the SDK accepts it
+            self._bucket(self.bucket_name).blob(_WARM_UP_BLOB_NAME).exists(timeout=_TIMEOUT, retry=None)  # pyright: ignore[reportArgumentType]
+            log.debug("GCSClient: Warm-up request completed.")
+        except Exception as e:
+            log.warning("GCSClient: Warm-up request failed: %s", e)
+
     def _get_validated_names(self, bucket_name: Optional[str], blob_name: Optional[str], context: str) -> Optional[Tuple[str, str]]:
         """
         Internal helper to prioritize argument names over default names and validate they are present.
@@ -39,11 +125,11 @@ class GCSClient:
         target_bucket_name: Optional[str] = bucket_name or self.bucket_name
         target_blob_name: Optional[str] = blob_name or self.blob_name
 
-        log.debug(f"[{context}] Validating names. Result: gs://{target_bucket_name}/{target_blob_name}")
+        log.debug("[%s] Validating names. Result: gs://%s/%s", context, target_bucket_name, target_blob_name)
 
         # 2. Validate that both names are available
         if target_bucket_name is None or target_blob_name is None:
-            log.error(f"Error ({context}): Both bucket_name and blob_name must be provided.")
+            log.error("Error (%s): Both bucket_name and blob_name must be provided.", context)
             return None
         
         # 3. Return as a tuple of non-None strings
@@ -53,11 +139,11 @@ class GCSClient:
         """Internal helper to get the Blob object, handling exceptions."""
         try:
             # 1. Get the bucket and blob references
-            bucket: Bucket = self.storage_client.bucket(bucket_name)
+            bucket: Bucket = self._bucket(bucket_name)
             blob: Blob = bucket.blob(blob_name)
             return blob
         except Exception as e:
-            log.error(f"GCSClient: Error getting blob reference gs://{bucket_name}/{blob_name}: {e}")
+            log.error("GCSClient: Error getting blob reference gs://%s/%s: %s", bucket_name, blob_name, e)
             return None
 
     # --- Core GCS Access Methods ---
@@ -77,12 +163,12 @@ class GCSClient:
         blob = self._get_blob_or_none(target_bucket_name, target_blob_name)
         
         if blob:
-            log.info(f"GCSClient: Reference created for blob: gs://{target_bucket_name}/{target_blob_name}")
+            log.info("GCSClient: Reference created for blob: gs://%s/%s", target_bucket_name, target_blob_name)
         
         return blob
 
 
-    def get_blob_content(self, bucket_name: Optional[str] = None, blob_name: Optional[str] = None, encoding: str = "utf-8") -> Union[str, bytes, None]:
+    def get_blob_content(self, bucket_name: Optional[str] = None, blob_name: Optional[str] = None, encoding: str = "utf-8") -> Optional[str]:
         """
         Fetches the text content of a blob from a GCS bucket.
         """
@@ -93,25 +179,68 @@ class GCSClient:
             log.warning("GCSClient: Skipping content read as blob reference is missing.")
             return None
 
-        log.debug(f"GCSClient: Reading content from {blob.name} with encoding '{encoding}'.")
+        log.debug("GCSClient: Reading content from %s with encoding '%s'.", blob.name, encoding)
         try:
-            # 2. Open blob in read text mode ('r')
-            with blob.open("r", encoding=encoding) as f:
-                content: Union[str, bytes] = f.read()
-            
+            # 2. Download and decode the blob in a single request
+            content: str = blob.download_as_text(encoding=encoding, timeout=_TIMEOUT, retry=_RETRY)
+
             log.info("GCSClient: Successfully read blob content.")
             return content
         except Exception as e:
             # 3. Handle read errors
-            log.error(f"GCSClient: Failed to read content for blob '{blob.name}': {e}")
+            log.error("GCSClient: Failed to read content for blob '%s': %s", blob.name, e)
+            return None
+
+    def get_blob_lines(self, bucket_name: Optional[str] = None, blob_name: Optional[str] = None, encoding: str = "utf-8", max_lines: Optional[int] = None, max_bytes: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Fetches the non-blank lines of a blob from a GCS bucket.
+
+        Args:
+            max_lines (Optional[int]): Return at most this many lines.
+            max_bytes (Optional[int]): Download only the first max_bytes bytes (a ranged GET) instead of the whole object.
+        """
+        # 1. Get the blob object
+        blob: Optional[Blob] = self.get_blob(bucket_name, blob_name)
+
+        if blob is None:
+            log.warning("GCSClient: Skipping content read as blob reference is missing.")
+            return None
+
+        log.debug("GCSClient: Reading lines from %s with encoding '%s'.", blob.name, encoding)
+        try:
+            # 2. Download the raw bytes in a single request (optionally only a leading range)
+            if max_bytes is not None:
+                content: bytes = blob.download_as_bytes(start=0, end=max_bytes - 1, timeout=_TIMEOUT, retry=_RETRY)
+            else:
+                content = blob.download_as_bytes(timeout=_TIMEOUT, retry=_RETRY)
+
+            # 3. Stop before a trailing partial line if the range cut one off
+            end: int = len(content)
+            if max_bytes is not None and end >= max_bytes and not content.endswith(b"\n"):
+                end = content.rfind(b"\n") + 1
+
+            # 4. Lazily keep non-blank lines and decode only the ones being returned
+            non_blank = (line for line in _iter_lines(content, end) if line.strip())
+            lines: List[str] = [line.decode(encoding) for line in islice(non_blank, max_lines)]
+
+            log.info("GCSClient: Successfully read %d lines of blob content.", len(lines))
+            return lines
+        except Exception as e:
+            # 5. Handle read errors
+            log.error("GCSClient: Failed to read lines for blob '%s': %s", blob.name, e)
             return None
 
     # --- Data Management Method ---
 
-    def move_blob(self, source_bucket_name: Optional[str] = None, source_blob_name: Optional[str] = None, target_bucket_name: Optional[str] = None, target_blob_name: Optional[str] = None) -> bool:
+    def move_blob(self, source_bucket_name: Optional[str] = None, source_blob_name: Optional[str] = None, target_bucket_name: Optional[str] = None, target_blob_name: Optional[str] = None, source_generation: Optional[int] = None) -> bool:
         """
-        Moves a blob from one GCS location to another (Copy + Delete).
-        
+        Moves a blob from one GCS location to another.
+        Within a single bucket this is one atomic server-side move; across buckets it is a Copy + Delete.
+
+        Args:
+            source_generation (Optional[int]): Generation of the source object (e.g. from the event payload).
+                When given, it is sent as a precondition so a replayed event cannot move a newer object.
+
         Returns:
             bool: True if move was successful, False otherwise.
         """
@@ -126,26 +255,109 @@ class GCSClient:
         
         # 3. Safety Check: Same location?
         if _source_blob_name == _target_blob_name and _source_bucket_name == _target_bucket_name:
-            log.warning(f"GCSClient: Source and target locations are the same. No action taken.")
+            log.warning("GCSClient: Source and target locations are the same. No action taken.")
             return False
 
-        log.info(f"GCSClient: Moving gs://{_source_bucket_name}/{_source_blob_name} to gs://{_target_bucket_name}/{_target_blob_name}")
+        log.info("GCSClient: Moving gs://%s/%s to gs://%s/%s", _source_bucket_name, _source_blob_name, _target_bucket_name, _target_blob_name)
         
         try:
             # 4. Get References
-            source_bucket: Bucket = self.storage_client.bucket(_source_bucket_name)
-            target_bucket: Bucket = self.storage_client.bucket(_target_bucket_name)
+            source_bucket: Bucket = self._bucket(_source_bucket_name)
             source_blob: Blob = source_bucket.blob(_source_blob_name)
 
-            # 5. Copy the blob to the target
-            source_bucket.copy_blob(source_blob, target_bucket, _target_blob_name)
+            # 5. Same bucket: atomic server-side move
+            if _source_bucket_name == _target_bucket_name:
+                self._move_within_bucket(source_bucket, source_blob, _target_blob_name, source_generation)
+                return True
+
+            # 6. Cross bucket: copy to the target, only if no object exists there yet
+            target_bucket: Bucket = self._bucket(_target_bucket_name)
+            source_bucket.copy_blob(source_blob, target_bucket, _target_blob_name, if_generation_match=0, if_source_generation_match=source_generation, timeout=_TIMEOUT, retry=_RETRY_IF_GENERATION_SPECIFIED)
             log.debug("GCSClient: Copy operation completed.")
 
-            # 6. Delete the original blob
-            source_blob.delete()
+            # 7. Delete the original blob (only if it is still the expected generation, when known)
+            # NOTE: Not batched with the copy: a batch gives no ordering between its parts, so the
+            # delete could succeed while the copy fails. The delete must wait for the copy's response.
+            source_blob.delete(if_generation_match=source_generation, timeout=_TIMEOUT, retry=_RETRY_IF_GENERATION_SPECIFIED)
             log.info("GCSClient: Move successful (Copied and Deleted).")
 
             return True
         except Exception as e:
-            log.error(f"GCSClient: Failed to move blob. Error: {e}")
-            return False
\ No newline at end of file
+            log.error("GCSClient: Failed to move blob. Error: %s", e)
+            return False
+
+    def move_blob_same_bucket(self, source_blob_name: str, target_blob_name: str, source_generation: Optional[int] = None) -> bool:
+        """
+        Fast path for moving a blob within the default bucket.
+        Skips name resolution and validation: the caller guarantees distinct, valid names.
+
+        Returns:
+            bool: True if move was successful, False otherwise.
+        """
+        bucket_name: Optional[str] = self.bucket_name
+        if bucket_name is None:
+            log.error("Error (move_blob_same_bucket): GCSClient has no default bucket_name.")
+            return False
+
+        log.info("GCSClient: Moving gs://%s/%s to gs://%s/%s", bucket_name, source_blob_name, bucket_name, target_blob_name)
+
+        try:
+            bucket: Bucket = self._bucket(bucket_name)
+            source_blob: Blob = bucket.blob(source_blob_name)
+            self._move_within_bucket(bucket, source_blob, target_blob_name, source_generation)
+            return True
+        except Exception as e:
+            log.error("GCSClient: Failed to move blob. Error: %s", e)
+            return False
+
+    def _move_within_bucket(self, bucket: Bucket, source_blob: Blob, target_blob_name: str, source_generation: Optional[int]) -> None:
+        """
+        Internal helper to move a blob within its bucket with a single atomic request (objects.moveTo).
+        Falls back to Copy + Delete (rename_blob) if the API rejects the move; other errors propagate to the caller.
+        """
+        try:
+            bucket.move_blob(source_blob, target_blob_name, if_source_generation_match=source_generation, timeout=_TIMEOUT, retry=_RETRY_IF_GENERATION_SPECIFIED)
+            log.info("GCSClient: Move successful (Moved).")
+        except (BadRequest, MethodNotImplemented) as e:
+            log.warning("GCSClient: Atomic move rejected (%s). Falling back to Copy + Delete.", e)
+            bucket.rename_blob(source_blob, target_blob_name, if_source_generation_match=source_generation, timeout=_TIMEOUT, retry=_RETRY_IF_GENERATION_SPECIFIED)
+            log.info("GCSClient: Move successful (Copied and Deleted).")
+
+    async def move_blob_async(self, source_bucket_name: Optional[str] = None, source_blob_name: Optional[str] = None, target_bucket_name: Optional[str] = None, target_blob_name: Optional[str] = None, source_generation: Optional[int] = None) -> bool:
+        """
+        Async wrapper around move_blob; runs the blocking GCS calls in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.move_blob,
+            source_bucket_name=source_bucket_name,
+            source_blob_name=source_blob_name,
+            target_bucket_name=target_bucket_name,
+            target_blob_name=target_blob_name,
+            source_generation=source_generation,
+        )
+
+    def move_blobs(self, pairs: List[Tuple[str, str]], max_concurrency: int = _MAX_CONCURRENT_MOVES) -> List[bool]:
+        """
+        Moves several blobs concurrently, with at most max_concurrency moves in flight.
+        Must be called from synchronous code (it starts its own event loop).
+        Values of max_concurrency above the HTTP connection pool size (10) gain nothing.
+
+        Args:
+            pairs (List[Tuple[str, str]]): (source_blob_name, target_blob_name) pairs, resolved against the default bucket.
+
+        Returns:
+            List[bool]: The move_blob result for each pair, in input order.
+        """
+        async def _move_all() -> List[bool]:
+            # Size the worker pool so the semaphore, not the default executor, is the limit
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_concurrency))
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def _move(source: str, target: str) -> bool:
+                async with semaphore:
+                    return await self.move_blob_async(source_blob_name=source, target_blob_name=target)
+
+            return list(await asyncio.gather(*(_move(source, target) for source, target in pairs)))
+
+        log.info("GCSClient: Moving %d blobs (max %d concurrent).", len(pairs), max_concurrency)
+        return asyncio.run(_move_all())
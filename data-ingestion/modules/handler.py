@@ -1,6 +1,7 @@
 # handler.py
 
 import logging as log
+import os
 from typing import Dict, Any, List, Optional 
 
 # Local imports
@@ -10,6 +11,33 @@ from modules.gcs import GCSClient
 SOURCE_BUCKET: str = "supply-chain-compensation-analysis-with-nlp"
 SOURCE_FOLDER: str = "raw_data"
 TARGET_FOLDER: str = "processed_data"
+SAMPLE_LINES: int = 5
+SAMPLE_BYTES: int = 65536
+
+# Set DEBUG_SAMPLE=1 to download and log a sample of each file (skipped by default)
+DEBUG_SAMPLE: bool = os.environ.get("DEBUG_SAMPLE", "").lower() in ("1", "true", "yes")
+
+# Precomputed folder prefixes for the cheap startswith() check and the target path
+_SOURCE_PREFIX: str = SOURCE_FOLDER + "/"
+_TARGET_PREFIX: str = TARGET_FOLDER + "/"
+
+# Shared client bound to the source bucket, created at import (global init phase) when possible
+_GCS_CLIENT: Optional[GCSClient] = None
+try:
+    _GCS_CLIENT = GCSClient(bucket_name=SOURCE_BUCKET)
+    # Open the HTTP session (token fetch, TCP + TLS) during init instead of on the first event
+    _GCS_CLIENT.warm_up()
+except Exception as e:
+    # e.g. no Application Default Credentials (local runs, tooling); never fail the import
+    log.warning("GCS client initialization failed at import; deferring to the first event: %s", e)
+
+
+def _get_gcs_client() -> GCSClient:
+    """Returns the shared GCS client, creating it on first use if import-time setup failed."""
+    global _GCS_CLIENT
+    if _GCS_CLIENT is None:
+        _GCS_CLIENT = GCSClient(bucket_name=SOURCE_BUCKET)
+    return _GCS_CLIENT
 
 
 def handle_gcs_event_data(data: Dict[str, Any]) -> None:
@@ -22,56 +50,48 @@ def handle_gcs_event_data(data: Dict[str, Any]) -> None:
     # 1. Extract bucket and blob names
     bucket_name: str = data.get("bucket", "")
     blob_name: str = data.get("name", "")
-    
-    # Extract folder path for validation and blob name (file name) for target path
-    folder_path: str
-    blob_path: str
-    folder_path, blob_path = blob_name.rsplit('/', 1) if '/' in blob_name else ("", blob_name)
 
-    log.info(f"Received event for file: gs://{bucket_name}/{blob_name}")
+    log.info("Received event for file: gs://%s/%s", bucket_name, blob_name)
     
     # 2. Validation Checks
     
     # 2a. Validate the bucket name
     if bucket_name != SOURCE_BUCKET:
-        log.info(f"Filtering: Ignoring event for bucket: {bucket_name}. Expected: {SOURCE_BUCKET}")
+        log.info("Filtering: Ignoring event for bucket: %s. Expected: %s", bucket_name, SOURCE_BUCKET)
         return
 
-    # 2b. Validate the folder/prefix
-    log.debug(f"Folder path check: folder_path='{folder_path}', SOURCE_FOLDER='{SOURCE_FOLDER}'")
-    if folder_path != SOURCE_FOLDER:
-        log.info(f"Filtering: Ignoring event for blob name: {blob_name}. Expected prefix: {SOURCE_FOLDER}/")
+    # 2b. Validate the folder/prefix (files directly inside SOURCE_FOLDER only, no sub-folders)
+    log.debug("Folder path check: blob_name='%s', SOURCE_FOLDER='%s'", blob_name, SOURCE_FOLDER)
+    if not blob_name.startswith(_SOURCE_PREFIX) or blob_name.find("/", len(_SOURCE_PREFIX)) != -1:
+        log.info("Filtering: Ignoring event for blob name: %s. Expected prefix: %s/", blob_name, SOURCE_FOLDER)
         return
 
-    log.info(f"Validated file: Processing gs://{bucket_name}/{blob_name}")
+    # Extract the generation for the move
+    generation: Optional[int] = int(data["generation"]) if data.get("generation") else None
 
-    # 3. Initialize GCS Client with event details as defaults
-    gcs_client: GCSClient = GCSClient(bucket_name=bucket_name, blob_name=blob_name)
-    
-    # 4. Get the blob content
-    blob_data: Optional[str] = gcs_client.get_blob_content()
-
-    # 5. Process and Move
-    if blob_data is not None:
-        log.info(f"Successfully read {len(blob_data)} bytes of data.") 
-        
-        # --- Data Processing Step ---
-        raw_data: List[str] = [line for line in blob_data.split('\n') if line.strip() != '']
-        log.info(f"Raw Data Sample (first 5 lines): {raw_data[:5]}")
-
-        # Target path format: processed_data/replies.txt
-        target_blob_name: str = f"{TARGET_FOLDER}/{blob_path}"
-        
-        # 6. Move the blob (Copy + Delete)
-        move_success: bool = gcs_client.move_blob(
-            target_bucket_name=bucket_name,        
-            target_blob_name=target_blob_name,     
-        )
-        
-        if not move_success:
-            log.error(f"Failed to move blob to {target_blob_name}. Check GCS logs for details.")
-
-    else:
-        log.error("Failed to retrieve blob content. Stopping processing.")
+    log.info("Validated file: Processing gs://%s/%s", bucket_name, blob_name)
+
+    # Get the shared GCS client (created here if import-time setup failed)
+    gcs_client: GCSClient = _get_gcs_client()
+
+    # 3. Log the object size from the event metadata (no GCS request needed)
+    log.info("Event reports %s bytes of data.", data.get("size", "unknown"))
+
+    # 3a. Optionally get a sample of the blob content (ranged read of the leading bytes only)
+    if DEBUG_SAMPLE:
+        raw_data: Optional[List[str]] = gcs_client.get_blob_lines(blob_name=blob_name, max_lines=SAMPLE_LINES, max_bytes=SAMPLE_BYTES)
+        if raw_data is not None:
+            log.info("Raw Data Sample (first %d lines): %s", SAMPLE_LINES, raw_data)
+        else:
+            log.warning("Failed to retrieve blob sample. Continuing with move.")
+
+    # Target path format: processed_data/replies.txt (the prefix check guarantees the first match is the prefix)
+    target_blob_name: str = blob_name.replace(_SOURCE_PREFIX, _TARGET_PREFIX, 1)
+
+    # 4. Move the blob (bucket and names are already validated above)
+    move_success: bool = gcs_client.move_blob_same_bucket(blob_name, target_blob_name, source_generation=generation)
+
+    if not move_success:
+        log.error("Failed to move blob to %s. Check GCS logs for details.", target_blob_name)
 
     log.info("Finished handling GCS event.")
\ No newline at end of file